@@ -28,19 +28,22 @@
 # |    2. UDP (SOCK_DGRAM)
 # |       - Connectionless.
 # |       - Faster, but unreliable: packets can be lost or arrive out of order.
-# |       - No built-in framing - each 'sendto()' call is one discrete packet.
+# |       - No built-in framing - each 'send()' call is one discrete packet.
 # | 
 # | Common socket calls in this script:
 # |    socket.socket(family, type)   -> Creating a socket (IPv4 + TCP/UDP type).
-# |    sock.connect((host, port))    -> TCP-only: establishing a connection.
+# |    sock.connect((host, port))    -> TCP: establishing a connection.
+# |                                     UDP: no connection is made - it only fixes the destination address for all datagrams.
 # |    sock.sendall(data)            -> TCP: sending all bytes, blocking until done.
-# |    sock.sendto(data, addr)       -> UDP: send a datagram to the specific address.
+# |    sock.send(data)               -> UDP: send a datagram to the address given in 'connect()'.
+# |    sock.setsockopt(level, opt, v)-> Setting socket options (TCP_NODELAY, SO_SNDBUF).
 # |    sock.close()                  -> Closing the socket.
 # | 
 # | Error handling:
 # |    socket.error covers all network issues (timeout, connection reset, etc.).
 # |    On TCP, losing connection raises an error - in that case, we reconnect.
-# |    On UDP, errors usually occur only if the local OS refuses to send.
+# |    On UDP, errors usually occur only if the local OS refuses to send. Because the UDP socket is "connected",
+# |    the OS can also report that the server port is unreachable (ConnectionRefusedError) - we reconnect then as well.
 # | 
 # | Link to a nice refresher material about sockets in Python - check here:
 # | https://realpython.com/python-sockets/
@@ -65,7 +68,7 @@
 # | By storing the inode together with the offset (inode:offset), we would know exactly which file
 # | the offset refers to, even if the path stays the same.
 # |
-# | On each read, we would check the inode of LOG_FILE_PATH using 'os.stat(file_path).st_ino'.
+# | The log file is kept open, and its inode is taken from the open file using 'os.fstat(fd).st_ino'.
 # |  - This inode is converted to a string and used as the key in the state file.
 # |  - If the inode changes (log rotated), our stored offset for the new inode
 # |    will likely be missing - so we start reading from offset 0 for the new file.
@@ -74,6 +77,11 @@
 # |  - Prevents mixing offsets between different physical files.
 # |  - Handles log rotation automatically without extra logic.
 # |
+# | Rotation itself is noticed when there is nothing new to read: if 'os.stat(LOG_FILE_PATH).st_ino' no longer
+# | matches the inode of the open file, the old file has been fully read and the new one is opened.
+# | The 'os.stat()' call is only made after inotify reported that the watched file was moved, deleted or changed
+# | its attributes (or always, where inotify is not available) - otherwise the file at the path is known to be the open one.
+# |
 # | Possible limitations:
 # |  - If a file is rotated and replaced extremely quickly with the same inode,
 # |    this method could misinterpret the file. This is rare in practice.
@@ -96,98 +104,520 @@
 
 
 # --- Standard Library Imports ---
+# argparse: Parses command-line options (currently just --quiet).
+# random  : Adds jitter to the reconnect delay.
 # socket  : Provides low-level networking interface (TCP/UDP communication).
 # os      : Interacts with the operating system (file metadata, path handling).
 # json    : Reads/writes JSON (used here to store log reading position).
 # time    : Provides sleep delays between iterations.
+# select  : Waits on a file descriptor with a timeout (used for inotify events).
+# struct  : Unpacks the binary inotify event records, and packs/unpacks the binary state file.
+# ctypes  : Calls the Linux inotify functions from the C library directly, without third-party packages.
+# sys     : Checks the platform before trying to use Linux-only features.
+# threading, queue : Run the background thread that writes the state file, and hand the state over to it.
+# atexit  : Saves the state file one last time when the script exits.
+# signal  : Turns SIGTERM (e.g. from systemd) into a normal exit, so the 'atexit' handler still runs.
+import argparse
 import socket
 import os
 import json
 import time
+import random
+import select
+import struct
+import ctypes
+import ctypes.util
+import sys
+import threading
+import queue
+import atexit
+import signal
+
+# --- Optional Third-Party Import ---
+# orjson  : A much faster JSON library (written in Rust), used for the "json" state format if it is installed.
+#           Without it, the standard json module is used instead - the script keeps working with the standard library alone.
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 # JSON was chosen here because it's human-readable, so the offsets can easily be seen in plain text. 
 # Python's json module makes it easy to load and save without custom parsing code.
+# (The state is now stored in a compact binary format by default - see STATE_FORMAT. JSON is still available, and is also read for compatibility.)
 
 # --- Configuration ---
 LOG_FILE_PATH="/home/azuregenerator/wh.log"
 SYSLOG_SERVER_IP="10.0.0.5"
 SYSLOG_SERVER_PORT=55141  # 55140 for UDP or 55141 for TCP
 PROTOCOL="TCP"    # "UDP" or "TCP" - rsyslog server configuration supports both
-STATE_FILE_PATH="/tmp/.log_sender_state.json" # Path to the JSON state file that stores the last read position
+# How messages are separated over TCP (UDP does not need this - every datagram is one message):
+#  - "octet"   : each message is sent as '<length> message' (octet counting). Lines are read and framed one by one in Python.
+#  - "newline" : the log file is sent as it is, with each message ending at its newline. rsyslog's imtcp accepts this too.
+#                This lets the kernel copy the new part of the file straight to the socket ('sendfile()'), without reading it into Python.
+FRAMING="octet"
+STATE_FILE_PATH="/tmp/.log_sender_state.bin" # Path to the state file that stores the last read position
+# Path of the JSON state file used by earlier versions of the script. It is read once if STATE_FILE_PATH does not exist yet,
+# so an upgraded installation continues from its saved positions instead of sending every log file again from the start.
+LEGACY_STATE_FILE_PATH="/tmp/.log_sender_state.json"
+# Format of the state file: "binary" (compact, fast to read and write) or "json" (human-readable, the original format).
+# Either way, an existing state file in the other format is still read, so switching does not lose the saved positions.
+STATE_FORMAT="binary"
 # Setting a delay in seconds between checking for new log lines in the log file.
 # A small delay may prevent the script from consuming too much CPU.
 POLLING_INTERVAL=2
+# On Linux, the script waits for inotify events instead of sleeping for POLLING_INTERVAL (see LogFileWatcher below).
+# This timeout is a safety net: even if no event arrives, the file is checked again at least this often (in seconds).
+WATCH_TIMEOUT=5
+# Printing one progress line per poll cycle. Set to True (or run the script with --quiet) to not print progress at all, e.g. in production.
+QUIET=False
+# The state is kept in memory and written to STATE_FILE_PATH by a background thread, at most once every this many seconds,
+# and on shutdown - instead of reading and rewriting the whole file after every batch.
+STATE_SAVE_INTERVAL=0.5
+# The most that is read from the log file at once (1 MiB). Reading big blocks and splitting them into lines in one go
+# is much cheaper than reading the file line by line. If more than this is waiting, the next block is read right away.
+READ_BUFFER_SIZE=1 << 20
+# Size of the kernel send buffer of the socket (4 MiB). A bigger buffer lets a whole batch be handed to the kernel
+# without waiting for the server to acknowledge it first. Note: Linux silently caps this at 'net.core.wmem_max'.
+SOCKET_SEND_BUFFER_SIZE=4 << 20
+# Delay before reconnecting after a socket error (in seconds). The first retry happens after RECONNECT_DELAY_MIN,
+# and every further failed attempt doubles the delay, up to RECONNECT_DELAY_MAX. It goes back to the minimum once a batch is sent.
+RECONNECT_DELAY_MIN=1
+RECONNECT_DELAY_MAX=60
 
-# The function for getting the last read position from the state file (the last byte offset read from the log file, stored in STATE_FILE_PATH).
-# Using a key of "absolute_path:inode" as a unique identifier to handle log rotation.
-# This is to be able to read only the new logs instead of all the logs from the beginning every time the script starts to run. 
-# If the log file is rotated (renamed/recreated), it will have a different inode. 
-# This ensures we don't mistakenly use an offset from an old file version. 
-# Multiple files can be tracked at once while still detecting log rotation for each file individually.
-# This is an improvement in comparison with my first solution for the log reading tool using Bash.
-def get_last_position(file_path, state_file):
-    try:
-        abs_path = os.path.abspath(file_path)
-        inode = str(os.stat(file_path).st_ino)
-        key = f"{abs_path}:{inode}"
-
-        with open(state_file, 'r') as f:
-            state = json.load(f)
-            # Return the stored offset for this key, or 0 if not found.
-            return state.get(key, 0)    # Returns integer offset in bytes, or defaults to 0 if no record exists
-    except (FileNotFoundError, json.JSONDecodeError):
-        # If the state file does not exist or is invalid, start from the beginning.
-        return 0
-
-# The function for writing the current read position (read byte offset) for the given file to the state file. 
-# This ensures that in case the script restarts, it will resume where it previously left off. 
-# Uses "absolute_path:inode" as the key so multiple files can coexist in state.
-def update_last_position(file_path, state_file, offset):
-    abs_path = os.path.abspath(file_path)
-    inode = str(os.stat(file_path).st_ino)
-    key = f"{abs_path}:{inode}"
-
-    state = {}
+# ===============================================================================
+# |              Some notes about the binary state format
+# |
+# | The state is just a list of "key -> offset" records, so it does not need a general-purpose format like JSON.
+# | The binary state file is laid out as:
+# |    b"LSS1"                                  -> 4-byte marker, to tell the format apart from JSON.
+# |    then, for each record:
+# |      key length  (2 bytes, little-endian)   -> struct '<H'
+# |      key         (UTF-8 bytes)               -> "absolute_path:inode"
+# |      offset      (8 bytes, little-endian)   -> struct '<Q'
+# |
+# | Writing it is just 'struct.pack()' calls joined into one 'write()', and reading it does not need any tokenizing.
+# | A file without the marker is treated as JSON, so a state file from an older version keeps working.
+# ===============================================================================
+STATE_MAGIC = b"LSS1"
+STATE_KEY_LENGTH = struct.Struct("<H")
+STATE_OFFSET = struct.Struct("<Q")
+
+# The function for packing the state dictionary into the binary format described above.
+def pack_state(state_dict):
+    parts = [STATE_MAGIC]
+    for key, offset in state_dict.items():
+        key_bytes = key.encode('utf-8', errors='surrogateescape')
+        parts.append(STATE_KEY_LENGTH.pack(len(key_bytes)))
+        parts.append(key_bytes)
+        parts.append(STATE_OFFSET.pack(offset))
+    return b"".join(parts)
+
+# The function for unpacking the state dictionary from the binary format.
+# Raises struct.error if the data is cut short, or UnicodeDecodeError if a key is damaged.
+def unpack_state(data):
+    state_dict = {}
+    pos = len(STATE_MAGIC)
+    while pos < len(data):
+        (key_length,) = STATE_KEY_LENGTH.unpack_from(data, pos)
+        pos += STATE_KEY_LENGTH.size
+        key = data[pos:pos + key_length].decode('utf-8', errors='surrogateescape')
+        pos += key_length
+        (offset,) = STATE_OFFSET.unpack_from(data, pos)
+        pos += STATE_OFFSET.size
+        state_dict[key] = offset
+    return state_dict
+
+# The functions for converting the state to and from JSON (STATE_FORMAT="json", and state files from older versions).
+# orjson is used if it is installed, but it refuses strings with lone surrogates - and keys can contain them on purpose
+# ('surrogateescape' keeps paths that are not valid UTF-8). The standard json module writes them as '\udcxx' escapes,
+# so it is used for such a state instead - both for writing it and for reading it back.
+def dump_state_json(state_dict):
+    if orjson is not None:
+        try:
+            return orjson.dumps(state_dict)
+        except TypeError:
+            # orjson.JSONEncodeError is a TypeError.
+            pass
+    return json.dumps(state_dict).encode('utf-8')
+
+def load_state_json(data):
+    if orjson is not None:
+        try:
+            return orjson.loads(data)
+        except ValueError:
+            # orjson.JSONDecodeError is a ValueError.
+            pass
+    return json.loads(data)
+
+# The class for keeping the whole state (all "absolute_path:inode" -> offset records) in memory.
+# The state file is read only once, at startup. After that, every batch just updates the dictionary in memory,
+# and the state file is written by a separate background thread - so the tailing loop never waits for the disk.
+# How the background writing works:
+#  - After each batch, a copy of the state is handed to the writer thread through a queue that holds only one item.
+#    If the writer has not picked up the previous copy yet, that copy is replaced - only the newest state matters.
+#    (A copy of the whole dictionary is passed, not just the changed record, so a record is never lost by being replaced.)
+#  - The writer waits STATE_SAVE_INTERVAL seconds after picking up a copy, takes the newest one if another has arrived
+#    in the meantime, and writes it. So a busy log file causes at most one write per STATE_SAVE_INTERVAL.
+#  - On shutdown, 'close()' stops the writer and writes the latest state one last time, from the main thread.
+# Writing the state file:
+#  - The state is first written to a temporary file next to it, and then renamed over the real one ('os.replace()').
+#    A rename is atomic, so the state file is always either the old or the new version - never a half-written one.
+#  - Trade-off: if the script is killed without a chance to clean up (e.g. 'kill -9' or power loss), the offsets of the last
+#    batches may not be on disk yet, and those logs are sent again after a restart. Duplicates are preferred over lost logs here.
+class StateStore:
+    def __init__(self, state_file, legacy_state_file=None):
+        self.state_file = state_file
+        self.legacy_state_file = legacy_state_file
+        self.state_dict = self.load()
+        self.dirty = False
+        self.queue = queue.Queue(maxsize=1)
+        self.stopping = threading.Event()
+        self.writer = threading.Thread(target=self.run_writer, name="state-writer", daemon=True)
+        self.writer.start()
+
+    # The function for reading the state file. If it does not exist yet or is invalid, start with an empty state.
+    # The format is recognized by the marker at the start of the file, not by STATE_FORMAT - so both formats can be read.
+    # If the state file does not exist yet, the legacy state file is read instead (the first run after an upgrade);
+    # from then on, the state is written to the state file only.
+    def load(self):
+        try:
+            try:
+                with open(self.state_file, 'rb') as f:
+                    data = f.read()
+            except FileNotFoundError:
+                if self.legacy_state_file is None:
+                    raise
+                with open(self.legacy_state_file, 'rb') as f:
+                    data = f.read()
+            if data.startswith(STATE_MAGIC):
+                return unpack_state(data)
+            state_dict = load_state_json(data)
+        except (FileNotFoundError, ValueError, struct.error):
+            # ValueError also covers json.JSONDecodeError and UnicodeDecodeError.
+            return {}
+        # A JSON file can contain anything (e.g. an edited or damaged file). Only records the binary format can store are kept -
+        # a text key and a non-negative whole-number offset - so that writing the state later cannot fail because of them.
+        if not isinstance(state_dict, dict):
+            return {}
+        return {key: offset for key, offset in state_dict.items()
+                if isinstance(offset, int) and not isinstance(offset, bool) and 0 <= offset < 1 << 64}
+
+    # The function for getting the stored offset for a key, or 0 if no record exists.
+    def get(self, key):
+        return self.state_dict.get(key, 0)
+
+    # The function for recording a new offset for a key. Updates the state in memory and passes a copy on to the writer thread.
+    def set(self, key, offset):
+        self.state_dict[key] = offset
+        self.dirty = True
+        self.submit(dict(self.state_dict))
+
+    # The function for putting an item into the one-item queue, replacing the item that is still waiting there (if any).
+    # Only the main thread puts items into the queue, so after taking the old item out, there is always room for the new one.
+    def submit(self, item):
+        try:
+            self.queue.put_nowait(item)
+        except queue.Full:
+            try:
+                self.queue.get_nowait()
+            except queue.Empty:
+                pass
+            self.queue.put_nowait(item)
+
+    # The function run by the writer thread. It stops when 'close()' sets the 'stopping' event (and puts a None item, to wake it up).
+    def run_writer(self):
+        while True:
+            snapshot = self.queue.get()
+            if snapshot is None:
+                return
+            # Letting more batches arrive, so that several of them are saved with a single write.
+            # Waiting on the 'stopping' event instead of sleeping, so that 'close()' does not have to wait for the pause to end.
+            if self.stopping.wait(STATE_SAVE_INTERVAL):
+                return
+            try:
+                snapshot = self.queue.get_nowait()
+            except queue.Empty:
+                pass
+            if snapshot is None:
+                return
+            try:
+                self.save(snapshot)
+            except (OSError, struct.error, ValueError, TypeError) as e:
+                # Exception - the state file cannot be written (e.g. the disk is full), or the state cannot be packed or converted
+                # (e.g. a key too long for the binary format). Keep running, so the writer thread does not stop; the next batch tries again.
+                print(f"Error: State file cannot be written to {self.state_file}: {e}")
+
+    # The function for writing the given state to the state file, in the format set by STATE_FORMAT.
+    def save(self, state_dict):
+        if STATE_FORMAT == "json":
+            data = dump_state_json(state_dict)
+        else:
+            data = pack_state(state_dict)
+        tmp_file = self.state_file + '.tmp'
+        with open(tmp_file, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, self.state_file)
+
+    # The function for stopping the writer thread and writing the latest state right away (used on shutdown).
+    # The writer is stopped first, so the two threads never write the state file at the same time.
+    def close(self):
+        self.stopping.set()
+        self.submit(None)
+        self.writer.join()
+        if self.dirty:
+            self.save(self.state_dict)
+            self.dirty = False
+
+# The class for keeping track of the read position of one opened log file.
+# An instance is created every time the log file is opened, and lives as long as that file stays open.
+# Everything that does not change while the file is open is computed only once, in the constructor:
+#  - abs_path : absolute path of the log file ('os.path.abspath()' involves 'getcwd()' and string processing).
+#  - inode    : taken with 'os.fstat()' from the already open file - unlike 'os.stat()', it does not resolve the path again,
+#               and it always belongs to the file we are actually reading, even if the path already points to a newer file after rotation.
+#  - key      : "absolute_path:inode", the key of this file in the state file.
+# The methods below then reuse the key instead of recomputing it on every poll cycle.
+class TailState:
+    def __init__(self, file_path, store, fd):
+        self.store = store
+        self.abs_path = os.path.abspath(file_path)
+        self.inode = os.fstat(fd).st_ino
+        self.key = f"{self.abs_path}:{self.inode}"
+        self.offset = self.get_last_position()
+
+    # The function for getting the last read position from the state (the last byte offset read from the log file, stored in STATE_FILE_PATH).
+    # Using a key of "absolute_path:inode" as a unique identifier to handle log rotation.
+    # This is to be able to read only the new logs instead of all the logs from the beginning every time the script starts to run. 
+    # If the log file is rotated (renamed/recreated), it will have a different inode. 
+    # This ensures we don't mistakenly use an offset from an old file version. 
+    # Multiple files can be tracked at once while still detecting log rotation for each file individually.
+    # This is an improvement in comparison with my first solution for the log reading tool using Bash.
+    def get_last_position(self):
+        # Returns integer offset in bytes, or defaults to 0 if no record exists
+        return self.store.get(self.key)
+
+    # The function for recording the current read position (read byte offset) for this file in the state (saved to disk in the background). 
+    # This ensures that in case the script restarts, it will resume where it previously left off. 
+    # Uses "absolute_path:inode" as the key so multiple files can coexist in state.
+    def update_last_position(self, offset):
+        self.offset = offset
+        self.store.set(self.key, offset)
+
+# The function for loading the C library, to call Linux system calls that Python does not wrap (inotify).
+# Returns None if not running on Linux, or if the library cannot be loaded - the callers then use their plain-Python fallbacks.
+def load_libc():
+    if not sys.platform.startswith('linux'):
+        return None
     try:
-        if os.path.exists(state_file):
-            with open(state_file, 'r') as f:
-                state = json.load(f)
-    except json.JSONDecodeError:
-        # Exception - the file exists but is corrupted (invalid JSON), overwrite it.
-        pass
-
-    state[key] = offset
-    with open(state_file, 'w') as f:
-        json.dump(state, f)
-
-# The function for sending a single log line to the syslog server
+        return ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+    except OSError:
+        return None
+
+LIBC = load_libc()
+
+# ===============================================================================
+# |              Some notes about "inotify"
+# |
+# | inotify is a Linux kernel feature that notifies a program about changes to a file.
+# | Instead of waking up every POLLING_INTERVAL seconds to check whether the log file has grown,
+# | the script blocks on the inotify file descriptor until the kernel reports a change.
+# |  - New lines are picked up right away, instead of up to POLLING_INTERVAL seconds later.
+# |  - An idle log file does not cause any wake-ups (apart from the WATCH_TIMEOUT safety net).
+# |
+# | Events used here (values from <sys/inotify.h>):
+# |  - IN_MODIFY      -> the file was written to (new log lines).
+# |  - IN_ATTRIB      -> metadata changed (e.g. the file was truncated or its permissions changed).
+# |  - IN_MOVE_SELF   -> the file was renamed - typical for log rotation.
+# |  - IN_DELETE_SELF -> the file was deleted.
+# |  - IN_IGNORED     -> the kernel removed the watch (the watched file is gone).
+# |
+# | A watch is attached to the file itself (its inode), not to the name. After rotation, the watch keeps
+# | following the old, renamed file - so the watch has to be re-added for the new file at LOG_FILE_PATH.
+# |
+# | If inotify is not available (not Linux, or the C library cannot be loaded), the script falls back
+# | to sleeping for POLLING_INTERVAL, exactly as before.
+# ===============================================================================
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_MOVE_SELF = 0x00000800
+IN_DELETE_SELF = 0x00000400
+IN_IGNORED = 0x00008000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+INOTIFY_EVENT = struct.Struct("iIII")   # wd, mask, cookie, len (followed by 'len' bytes of name)
+
+# The class for waiting until the log file changes.
+# Keeps the inotify file descriptor and the current watch between loop iterations, so they are created only once.
+class LogFileWatcher:
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.fd = None
+        self.wd = None
+        # The inode of the file known to be at file_path right now (None if it has to be checked with 'os.stat()').
+        self.confirmed_inode = None
+        if LIBC is None:
+            return
+        try:
+            fd = LIBC.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        except AttributeError:
+            # Exception - the inotify functions cannot be found in the C library, use the polling fallback.
+            return
+        if fd >= 0:
+            self.fd = fd
+
+    # The function for attaching a watch to the file currently found at file_path.
+    # Returns False if the file does not exist (yet), so the caller can fall back to sleeping.
+    def add_watch(self):
+        wd = LIBC.inotify_add_watch(self.fd, os.fsencode(self.file_path),
+                                         IN_MODIFY | IN_ATTRIB | IN_MOVE_SELF | IN_DELETE_SELF)
+        if wd < 0:
+            return False
+        self.wd = wd
+        try:
+            self.confirmed_inode = os.stat(self.file_path).st_ino
+        except FileNotFoundError:
+            self.confirmed_inode = None
+        return True
+
+    # The function for blocking until the log file changes, or until the timeout runs out.
+    def wait(self):
+        if self.fd is None:
+            time.sleep(POLLING_INTERVAL)
+            return
+
+        if self.wd is None:
+            if not self.add_watch():
+                time.sleep(POLLING_INTERVAL)
+                return
+            # A new watch was just added (at startup or after rotation). Lines could have been written before it existed,
+            # so returning right away lets the caller read the file once more instead of waiting for the next event.
+            return
+
+        readable, _, _ = select.select([self.fd], [], [], WATCH_TIMEOUT)
+        if readable:
+            self.read_events()
+
+    # The function for draining all pending events from the inotify file descriptor.
+    # Only the events meaning "the watched file is no longer at file_path" need handling - for those, the watch is dropped,
+    # and the next 'wait()' attaches a new one to whatever file is at the path by then.
+    # IN_ATTRIB also comes when the file is deleted while we still have it open (its link count drops), so after it,
+    # the file at the path is no longer taken as known and 'file_replaced()' checks it once with 'os.stat()'.
+    def read_events(self):
+        while True:
+            try:
+                data = os.read(self.fd, 4096)
+            except BlockingIOError:
+                return
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, name_len = INOTIFY_EVENT.unpack_from(data, offset)
+                offset += INOTIFY_EVENT.size + name_len
+                if wd != self.wd:
+                    continue
+                if mask & (IN_MOVE_SELF | IN_DELETE_SELF | IN_IGNORED):
+                    if not mask & IN_IGNORED:
+                        LIBC.inotify_rm_watch(self.fd, wd)
+                    self.wd = None
+                    self.confirmed_inode = None
+                elif mask & IN_ATTRIB:
+                    self.confirmed_inode = None
+
+    # The function for checking whether the log file has been rotated.
+    # Returns True if the file at file_path is no longer the one that is currently open (it has a different inode).
+    # If there is no file at file_path at the moment (the old one was renamed, the new one is not created yet), the open file is kept.
+    # While the watched file is still known to be at the path (no move/delete/attribute event since), no system call is needed at all.
+    def file_replaced(self, current_inode):
+        if self.confirmed_inode == current_inode:
+            return False
+        try:
+            inode = os.stat(self.file_path).st_ino
+        except FileNotFoundError:
+            return False
+        if inode == current_inode and self.wd is not None:
+            # The path still leads to the open (and watched) file - no need to check again until the next event.
+            self.confirmed_inode = inode
+        return inode != current_inode
+
+
+# The function for splitting the first 'end' bytes of a block read from the log file into log messages.
 # Behavior:
-#  - Strips newline characters.
+#  - Splits on newlines and strips whitespace from both ends of each line (including carriage returns).
 #  - Skips empty lines.
-#  - For UDP: sends datagram directly.
-#  - For TCP: sends length-prefixed message (common syslog framing).
+# 'split()' and 'strip()' run in C, so this is much faster than walking through the lines with a loop in Python
+# (even one that only creates memoryview windows instead of new bytes objects).
+def split_messages(data, end):
+    return [line for line in (raw.strip() for raw in data[:end].split(b'\n')) if line]
+
+# The function for adding a single TCP frame for a log line to the end of the 'frames' buffer (a bytearray).
+# Syslog over TCP with octet counting expects '<length> message', where length is the number of bytes of the message.
+# The length prefix is built directly as bytes (b"%d "), and the message is not formatted and encoded a second time.
+# Extending one bytearray for the whole batch grows it in place, instead of creating new bytes objects by joining them per line.
+# The message can be bytes (as returned by 'split_messages()'); a str is encoded to UTF-8 first.
+def append_frame(frames, message):
+    message_bytes = message.encode('utf-8') if isinstance(message, str) else message
+    frames.extend(b"%d " % len(message_bytes))
+    frames.extend(message_bytes)
+
+# The functions for sending a batch of log messages (everything read in one poll cycle) to the syslog server, one per protocol.
+# The messages come from 'split_messages()', so they are already stripped, and empty lines are already skipped.
+# The lines are read in binary mode, so they are already bytes and can be sent without encoding.
+# Both return the number of log messages sent, and let socket.error through to 'main()', which reconnects.
+# Improvement in comparison to Bash script solution.
+# The protocol is fixed when the script starts, so 'main()' picks the matching function once ('send_batch'), and the
+# tailing loop just calls it - there is no need to check the protocol again for every batch, or to go through the whole
+# script to modify all references to the protocol when switching between them.
+
+# UDP: sends one datagram per line. The socket is connected, so no destination address is passed with each datagram.
+# Linux can send many datagrams in one system call ('sendmmsg()'), but Python does not wrap it, and building its C structures
+# through ctypes for every message was measured to cost more than the system calls it saves - so a plain 'send()' loop is used.
+def send_udp_batch(sock, messages):
+    for message in messages:
+        sock.send(message)
+    return len(messages)
+
+# TCP: collects the length-prefixed messages (common syslog framing) of the batch in one bytearray, and sends it with 'sendall()'.
 # Why TCP framing?
 #  - Because syslog over TCP often expects a '<length> message' format to separate messages.
-def send_log_message(sock, message, protocol):
-    # Stripping any newlines and sending the message as a complete string.
-    message = message.strip()
-    if not message:
-        return
-
-    # Improvement in comparison to Bash script solution.
-    # This way, there is no need to go through the whole script to modify all references to the protocol when switching between them.
-    try:
-        if protocol == "UDP":
-            sock.sendto(message.encode('utf-8'), (SYSLOG_SERVER_IP, SYSLOG_SERVER_PORT))
-            print(f"[PYTHON] Forwarding log over UDP: {message}")
-        elif protocol == "TCP":
-            message_bytes = message.encode('utf-8')
-            framed_message = f"{len(message_bytes)} {message}".encode('utf-8')
-            sock.sendall(framed_message)
-            print(f"[PYTHON] Forwarding log over TCP: {message}")
-    # Exception - raising socket.error if the connection fails. 
-    except socket.error as e:
-        print(f"Socket error: {e}. Attempting to reconnect...")
-        raise
+# Why one bytearray?
+#  - Every send is at least one system call. Sending the whole batch at once means one call per poll cycle instead of one per log line.
+#  - Copying syslog-sized lines into one buffer is cheap. Passing them as a list of separate buffers ('sendmsg()') was measured
+#    to be slower, because Python has to handle every list item (two per line) on its own.
+def send_tcp_batch(sock, messages):
+    if messages:
+        frames = bytearray()
+        for message in messages:
+            append_frame(frames, message)
+        sock.sendall(frames)
+    return len(messages)
+
+
+# The function for sending the new part of the log file with newline framing (FRAMING="newline", TCP only).
+# 'os.sendfile()' is the 'sendfile()' system call: the kernel copies the file pages directly into the socket,
+# so the data is never copied into Python objects - no reading, no splitting into lines, no framing.
+# One call may send less than asked for, so it is called again until everything up to 'size'
+# (the file size the caller got from 'os.fstat()') is sent. The offset is passed explicitly, so the file position is not used.
+# Returns the new offset - the position right after the last sent byte.
+def send_file_range(sock, fd, offset, size):
+    while offset < size:
+        sent = os.sendfile(sock.fileno(), fd, offset, size - offset)
+        if sent == 0:
+            # The file got shorter in the meantime (truncated) - the next iteration will notice it.
+            break
+        offset += sent
+    return offset
+
+# The function for printing what was forwarded in one poll cycle.
+# Printing every forwarded line would cost a write to the console per log line (plus formatting it), which can take more time
+# than sending the logs at high log rates - so there is just one line per cycle, and nothing at all with QUIET.
+def report_forwarded(count, unit, total):
+    if not QUIET:
+        print(f"[PYTHON] Forwarded {count} {unit} over {PROTOCOL} (total: {total})")
+
+# The function for closing the connection after a failure (if the socket was created at all).
+def close_connection(sock):
+    if sock is not None:
+        sock.close()
 
 
 # Main function to initialize the socket and start the log-tailing loop.
@@ -201,6 +631,13 @@ def main():
     else:
         print("Error: PROTOCOL must be 'TCP' or 'UDP'.")
         exit(1)
+    if FRAMING not in ("octet", "newline"):
+        print("Error: FRAMING must be 'octet' or 'newline'.")
+        exit(1)
+    # With newline framing over TCP, the file is sent with 'sendfile()' instead of being read line by line.
+    use_sendfile = PROTOCOL == "TCP" and FRAMING == "newline"
+    # Choosing the send function for the protocol once (with sendfile, it is not used at all).
+    send_batch = send_udp_batch if PROTOCOL == "UDP" else send_tcp_batch
 
     print(f"Starting log sender to {SYSLOG_SERVER_IP}:{SYSLOG_SERVER_PORT} using {PROTOCOL}...")
     print(f" | Starting Python log sender script...\n")
@@ -209,68 +646,164 @@ def main():
     print(f" | Destination Host: {SYSLOG_SERVER_IP}\n")
     print(f" | Destination Port: {SYSLOG_SERVER_PORT}\n")
     print(f" | Protocol: {PROTOCOL}\n")
+    if PROTOCOL == "TCP":
+        print(f" | Framing: {FRAMING}\n")
     print(f" | --------------------------------------------------\n")
 
+    # Created once, outside of the reconnect loop, so the same watch is reused after reconnecting.
+    watcher = LogFileWatcher(LOG_FILE_PATH)
+    # Loading the state file once. Making sure the latest positions are written to disk when the script stops
+    # (normal exit, Ctrl+C, or SIGTERM - which would otherwise end the script without running the 'atexit' handlers).
+    store = StateStore(STATE_FILE_PATH, LEGACY_STATE_FILE_PATH)
+    atexit.register(store.close)
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    # The log file stays open between loop iterations (like 'tail -f'), instead of being opened, seeked and closed every time.
+    fd = None
+    # Counting the forwarded log lines (or bytes, with sendfile) for the progress output.
+    forwarded_total = 0
+    # Current delay before the next reconnect attempt (exponential backoff, see the socket error handling below).
+    reconnect_delay = RECONNECT_DELAY_MIN
+
     while True:
+        sock = None
         try:
-            # Create a socket and connect if using TCP
+            # Create a socket and connect it
             sock = socket.socket(socket.AF_INET, sock_type)
+            # Enlarging the send buffer before connecting (for TCP, the buffer size is taken into account when the connection is set up).
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, SOCKET_SEND_BUFFER_SIZE)
             if PROTOCOL == "TCP":
-                sock.connect((SYSLOG_SERVER_IP, SYSLOG_SERVER_PORT))
+                # Turning off Nagle's algorithm. It holds back small writes while earlier data is not yet acknowledged, to merge them.
+                # The script already sends each batch in one go, so waiting would only add delay (up to ~40 ms) before logs leave the machine.
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            # Connecting the socket. For UDP, this does not send anything - it just sets the destination once, so that every datagram
+            # can be sent with 'send()' without passing (and the OS looking up a route for) the address again each time.
+            sock.connect((SYSLOG_SERVER_IP, SYSLOG_SERVER_PORT))
 
             # Starting the "tailing" loop to continuously check for new logs in the file
             while True:
-                # Getting the last known position. 
-                # This call is outside of the file-opening block to ensure it is up to date on each loop iteration.
-                last_pos = get_last_position(LOG_FILE_PATH, STATE_FILE_PATH)
-                
-                with open(LOG_FILE_PATH, 'r') as f:
-                    f.seek(last_pos)
-                    new_logs = f.readlines()
-                    current_pos = f.tell()
-
-                    if new_logs:
-                        for line in new_logs:
-                            send_log_message(sock, line, PROTOCOL)
-                        # Writing the current read position to the state file
-                        # We need to update the local last_pos variable with the new position to prevent re-reading the same logs on the next iteration.
-                        update_last_position(LOG_FILE_PATH, STATE_FILE_PATH, current_pos)
-                        last_pos = current_pos
-                    
-                time.sleep(POLLING_INTERVAL)
+                if fd is None:
+                    # Opening the log file as a plain file descriptor. Reading is done with 'os.pread()', which reads from a given offset
+                    # in a single system call - no 'seek()' before each read, and no Python file object or buffering in between.
+                    # The data is read as bytes, so there is no need to decode it to text first (or to translate newlines for every line).
+                    fd = os.open(LOG_FILE_PATH, os.O_RDONLY)
+                    # Getting the last known position once per opened file - afterwards, it simply moves forward as we read.
+                    tail = TailState(LOG_FILE_PATH, store, fd)
+
+                # One 'os.fstat()' per iteration decides what to do: the size is compared with the position we have read up to.
+                #  - smaller: the file was truncated (emptied in place, e.g. by 'logrotate' with 'copytruncate', or '> file'), not rotated -
+                #    the inode is the same. Without this check, we would keep reading past the end of the file and get nothing
+                #    until it grows past the old size again.
+                #  - bigger: new data was appended, and it is read (or sent) below.
+                #  - equal: nothing to read - only the rotation check and the wait are left.
+                size = os.fstat(fd).st_size
+                if size < tail.offset:
+                    print(f"Log file {LOG_FILE_PATH} was truncated. Reading it again from the beginning...")
+                    tail.update_last_position(0)
+
+                if use_sendfile:
+                    # Sending everything that was appended since the last time, straight from the file to the socket.
+                    new_offset = send_file_range(sock, fd, tail.offset, size)
+                    has_new_logs = new_offset != tail.offset
+                    if has_new_logs:
+                        # Data went through, so the connection works - the next failure starts again with the shortest delay.
+                        reconnect_delay = RECONNECT_DELAY_MIN
+                        forwarded_total += new_offset - tail.offset
+                        report_forwarded(new_offset - tail.offset, "bytes of logs", forwarded_total)
+                        tail.update_last_position(new_offset)
+                elif size > tail.offset:
+                    # Reading a whole block (only what was appended, at most READ_BUFFER_SIZE) and splitting it into lines ourselves.
+                    # Only complete lines (ending with a newline) are sent. If the last line is still being written, it is left
+                    # in the file and read again on the next iteration - instead of being sent in two halves as two separate messages.
+                    data = os.pread(fd, min(size - tail.offset, READ_BUFFER_SIZE), tail.offset)
+                    end = data.rfind(b'\n') + 1
+                    if end == 0 and len(data) == READ_BUFFER_SIZE:
+                        # A single line longer than READ_BUFFER_SIZE - sending what was read, so the script does not get stuck on it.
+                        end = len(data)
+                    has_new_logs = end > 0
+                    if has_new_logs:
+                        # Sending everything that was read in this cycle as one batch.
+                        # The position is saved only after the batch is sent, so the saved offset never gets ahead of what was actually sent.
+                        sent_count = send_batch(sock, split_messages(data, end))
+                        if sent_count:
+                            # A batch went through, so the connection works - the next failure starts again with the shortest delay.
+                            reconnect_delay = RECONNECT_DELAY_MIN
+                        forwarded_total += sent_count
+                        report_forwarded(sent_count, "log lines", forwarded_total)
+                        # Recording the current read position (written to the state file in the background)
+                        tail.update_last_position(tail.offset + end)
+                    if len(data) == READ_BUFFER_SIZE:
+                        # There may be more waiting in the file - reading on without waiting for the next change.
+                        continue
+                else:
+                    has_new_logs = False
+
+                # The open file always has the same inode, so 'os.fstat(fd)' cannot show a rotation - the inotify events tell
+                # whether the file at LOG_FILE_PATH may have changed, and only then (or without inotify) it is checked with 'os.stat()'.
+                if not has_new_logs and watcher.file_replaced(tail.inode):
+                    # The old file will not get the newline for its last line anymore, so whatever is left is sent as the final line.
+                    if not use_sendfile and size > tail.offset:
+                        rest = os.pread(fd, size - tail.offset, tail.offset)
+                        sent_count = send_batch(sock, split_messages(rest, len(rest)))
+                        forwarded_total += sent_count
+                        report_forwarded(sent_count, "log lines", forwarded_total)
+                        tail.update_last_position(tail.offset + len(rest))
+                    # With newline framing, the last line of the old file has already been sent as it is. If it did not end with
+                    # a newline, the first line of the new file would be glued to it on the stream - so the newline is sent here.
+                    if use_sendfile and tail.offset > 0 and os.pread(fd, 1, tail.offset - 1) != b'\n':
+                        sock.sendall(b'\n')
+                    # Nothing left to read in the old file and a new file is at LOG_FILE_PATH - switching to the new file.
+                    os.close(fd)
+                    fd = None
+                    continue
+
+                # Waiting for the log file to change (or sleeping for POLLING_INTERVAL where inotify is not available).
+                watcher.wait()
 
         except FileNotFoundError:
+            # Nothing to close for the log file here - it is only missing while it is being opened, so 'fd' is still None.
             print(f"Error: Log file cannot be found at {LOG_FILE_PATH}. Retrying in {POLLING_INTERVAL} seconds...")
+            close_connection(sock)
             time.sleep(POLLING_INTERVAL)
         # Exception - if a socket error occurs (connection reset), close the socket and let the outer loop try to re-establish a connection.
+        # The delay grows exponentially (1, 2, 4, ... up to 60 seconds): a short blip is retried quickly, while a server that is down
+        # is not hammered with connection attempts. The random +/-20% (jitter) keeps many senders from retrying all at the same moment.
         except socket.error as e:
-            print(f"Socket error: {e}. Retrying connection in {POLLING_INTERVAL} seconds...")
-            sock.close()
-            time.sleep(POLLING_INTERVAL)
+            delay = reconnect_delay * (0.8 + 0.4 * random.random())
+            print(f"Socket error: {e}. Retrying connection in {delay:.1f} seconds...")
+            # The log file stays open: the position is only moved forward after a batch is sent,
+            # so the batch that failed is read and sent again from the same position after reconnecting.
+            close_connection(sock)
+            time.sleep(delay)
+            reconnect_delay = min(reconnect_delay * 2, RECONNECT_DELAY_MAX)
 
 
 # --- Script entry point --- 
 # Check if the script is being executed as the main module by using the __name__ variable.
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Reads logs from a file and forwards them to a syslog server.")
+    parser.add_argument("--quiet", action="store_true", help="do not print progress for forwarded logs")
+    if parser.parse_args().quiet:
+        QUIET = True
     main()
 
 
 # | --- Notes regarding possible issues and improvements to implement --- 
 # |
 # | 1. All config values are hardcoded; could be made configurable via command-line arguments to make it more flexible.
-# | 2. TCP connection retries happen only after a full failure; no backoff logic.
+# | 2. TCP connection retries happen only after a full failure. (Reconnecting now uses exponential backoff with jitter.)
 # | 3. UDP sends without confirmation - logs may be lost if the server is down.
 # | 4. STATE_FILE_PATH is stored on disk without locking - simultaneous runs could overwrite it.
 # | 5. If the log file is huge and STATE_FILE_PATH is missing, it will read from start.
 # | 6. TCP framing only works if the server expects octet-counted syslog. 
 # |    If the server is set to expect newline-terminated messages, this will fail to parse.
-# |    Idea: make the framing method configurable (FRAMING="octet" or "newline") to be able to switch without editing code. 
-# |    (Using octet framing currently, because testing showed that in my demo environment all log strings were being merged together.)
+# |    Done: the framing method is configurable now (FRAMING="octet" or "newline"), and "newline" also sends the file with 'sendfile()'.
+# |    (Using octet framing by default, because testing showed that in my demo environment all log strings were being merged together.)
 # | 7. Improvement idea: keep a retry buffer for failed messages so that their sending can be retried on reconnect.
 # | 8. If two instances of this script run at the same time (which shouldn't normally happen) on the same log filestate file, 
 # |    they can overwrite each other's JSON.
 # | 9. If the log file is truncated (not rotated), "seek(last_pos)"" might point beyond EOF, resulting in zero lines read until more are added. 
-# |    Idea: implement detection of truncation?
+# |    Done: truncation is detected (file size smaller than the saved position), and the file is read again from the beginning.
+# |    (If the file is truncated and then grows past the old position before the script looks at it, this still cannot be noticed.)
 # |  
 # |  ...
 # |  